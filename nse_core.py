@@ -0,0 +1,243 @@
+import requests
+import orjson
+from requests.adapters import HTTPAdapter, Retry
+import pandas as pd
+import numpy as np
+import threading
+import time
+import weakref
+from operator import itemgetter
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+# ─── Shared HTTP session (keep-alive + cookie reuse) ───────────────
+NSE_BASE = "https://www.nseindia.com"
+
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://www.nseindia.com/option-chain",
+    "Connection": "keep-alive",
+    "X-Requested-With": "XMLHttpRequest",
+    "Sec-Fetch-Site": "same-origin",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Dest": "empty",
+})
+
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+    ),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# ─── Anti-bot cookie (refreshed every 5 min) ─────────────────────────
+COOKIE_MAX_AGE = 300
+
+_COOKIE_FETCHED_AT = 0.0
+_COOKIE_LOCK = threading.Lock()
+
+def _ensure_cookie():
+    global _COOKIE_FETCHED_AT
+
+    # Warmup the NSE site only when the cookie is missing or stale
+    with _COOKIE_LOCK:
+        now = time.monotonic()
+        if _SESSION.cookies.get("nsit") and now - _COOKIE_FETCHED_AT < COOKIE_MAX_AGE:
+            return
+
+        _SESSION.get(f"{NSE_BASE}/option-chain", timeout=10)
+        _COOKIE_FETCHED_AT = now
+        time.sleep(0.5)
+
+def _invalidate_cookie():
+    global _COOKIE_FETCHED_AT
+
+    # Force the next call to warm up again after NSE rejects a request
+    with _COOKIE_LOCK:
+        _COOKIE_FETCHED_AT = 0.0
+        # set(None) removes every nsit cookie, whichever domain set it
+        _SESSION.cookies.set("nsit", None)
+
+# ─── Fetch ──────────────────────────────────────────────────────────
+def _get_json(url: str):
+    res = _SESSION.get(url, timeout=10)
+
+    if "application/json" not in res.headers.get("Content-Type", ""):
+        _invalidate_cookie()
+        raise Exception("Blocked by NSE (non-JSON response)")
+
+    try:
+        res.raise_for_status()
+    except requests.HTTPError:
+        _invalidate_cookie()
+        raise
+
+    return orjson.loads(res.content)
+
+def fetch_option_chain(symbol: str, is_index: bool = True, expiry: str | None = None):
+    _ensure_cookie()
+
+    if expiry is None:
+        url = f"{NSE_BASE}/api/option-chain-contract-info?{urlencode({'symbol': symbol})}"
+        json_data = _get_json(url)
+        return {"records": {"expiryDates": json_data.get("expiryDates", [])}}
+
+    option_type = "Indices" if is_index else "Equity"
+    url = f"{NSE_BASE}/api/option-chain-v3?{urlencode({'type': option_type, 'symbol': symbol, 'expiry': expiry})}"
+    return _get_json(url)
+
+# ─── In-process cache (2 min refresh, no pickling) ──────────────────
+CACHE_TTL = 120
+CACHE_MAX_ENTRIES = 8
+
+_RAW_CACHE: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+
+# Streamlit serves each session on its own thread
+_CACHE_LOCK = threading.Lock()
+# One lock per cache key, so a slow symbol never blocks other sessions;
+# entries disappear once no thread holds the lock
+_FETCH_LOCKS: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+def _fetch_lock(key):
+    with _CACHE_LOCK:
+        return _FETCH_LOCKS.setdefault(key, threading.Lock())
+
+def _lru_get(cache: OrderedDict, key):
+    with _CACHE_LOCK:
+        hit = cache.get(key)
+        if hit is not None:
+            cache.move_to_end(key)
+        return hit
+
+def _lru_put(cache: OrderedDict, key, value):
+    with _CACHE_LOCK:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+
+def get_option_chain(symbol: str, is_index: bool = True, expiry: str | None = None):
+    key = (symbol, is_index, expiry)
+
+    hit = _lru_get(_RAW_CACHE, key)
+    if hit is not None and time.monotonic() - hit[0] < CACHE_TTL:
+        return hit[1]
+
+    with _fetch_lock(key):
+        # Another session may have refreshed this key while we waited
+        now = time.monotonic()
+        hit = _lru_get(_RAW_CACHE, key)
+        if hit is not None and now - hit[0] < CACHE_TTL:
+            return hit[1]
+
+        raw = fetch_option_chain(symbol, is_index, expiry)
+        _lru_put(_RAW_CACHE, key, (now, raw))
+    return raw
+
+# ─── Parse & calculate OI % change ─────────────────────────────────
+def _oi_change_frame(strikes, oi, chg_oi, iv):
+    prev_oi = oi - chg_oi
+    # Raw ratio; rounding to 2 dp is left to the UI when it renders tables
+    pct = np.where(prev_oi > 0, chg_oi / np.maximum(prev_oi, 1) * 100, 0.0).astype(np.float32)
+
+    # Meaningful open interest, minus extreme noise (garbage spikes); the
+    # cut is on the 2-dp value users see, so nothing displays as 500.00
+    keep = (oi > 30000) & (np.round(pct, 2) < 500)
+
+    oi, pct = oi[keep], pct[keep]
+
+    return pd.DataFrame({
+        "Strike": strikes[keep],
+        "OI": oi,
+        "OI Change %": pct,
+        "IV": iv[keep],
+        # Smart scoring (real activity)
+        "Score": oi * pct,
+    })
+
+_LEG_FIELDS = ("openInterest", "changeinOpenInterest", "impliedVolatility")
+_get_leg_fields = itemgetter(*_LEG_FIELDS)
+
+def parse_oi_change(raw_json):
+    data = (
+        raw_json.get("filtered", {}).get("data")
+        or raw_json.get("records", {}).get("data")
+        or raw_json.get("data")
+    )
+
+    n = len(data)
+    # Narrow dtypes: IV fits float32, OI and its change fit int32; strikes
+    # stay float64 since it is the column users read exactly
+    strikes = np.empty(n, dtype=np.float64)
+    # Side-by-side columns: row 0 = CE, row 1 = PE
+    present = np.zeros((2, n), dtype=bool)
+    oi = np.zeros((2, n), dtype=np.int32)
+    chg_oi = np.zeros((2, n), dtype=np.int32)
+    iv = np.full((2, n), np.nan, dtype=np.float32)
+
+    for i, item in enumerate(data):
+        strikes[i] = item.get("strikePrice")
+
+        for side, key in enumerate(("CE", "PE")):
+            leg = item.get(key)
+            if not leg:
+                continue
+
+            try:
+                leg_oi, leg_chg, leg_iv = _get_leg_fields(leg)
+            except KeyError:
+                leg_oi, leg_chg, leg_iv = map(leg.get, _LEG_FIELDS)
+
+            present[side, i] = True
+            oi[side, i] = leg_oi or 0
+            chg_oi[side, i] = leg_chg or 0
+            iv[side, i] = np.nan if leg_iv is None else leg_iv
+
+    df_calls, df_puts = (
+        _oi_change_frame(strikes[m], oi[side][m], chg_oi[side][m], iv[side][m])
+        for side, m in enumerate(present)
+    )
+
+    return df_calls, df_puts
+
+# ─── Cached parse (reused until NSE timestamp changes) ──────────────
+# Kept in this module rather than st.session_state or app.py globals: the
+# meta refresh starts a new Streamlit session, and every rerun executes
+# app.py afresh, whereas nse_core is imported once per process.
+_PARSED_CACHE: OrderedDict[tuple, tuple[str, tuple]] = OrderedDict()
+
+def load_oi_change(symbol: str, is_index: bool, expiry: str | None):
+    raw = get_option_chain(symbol, is_index, expiry)
+    key = (symbol, is_index, expiry)
+    ts = raw.get("records", {}).get("timestamp")
+
+    hit = _lru_get(_PARSED_CACHE, key)
+    if ts is not None and hit is not None and hit[0] == ts:
+        return hit[1]
+
+    frames = parse_oi_change(raw)
+    _lru_put(_PARSED_CACHE, key, (ts, frames))
+    return frames
+
+# ─── Ranking ───────────────────────────────────────────────────────
+def top_k(df, column: str, k: int):
+    # O(N) selection of the k largest, then sort only those k (max first)
+    vals = df[column].to_numpy()
+    if len(vals) > k:
+        idx = np.argpartition(-vals, k)[:k]
+    else:
+        idx = np.arange(len(vals))
+    idx = idx[np.argsort(-vals[idx], kind="stable")]
+    return df.iloc[idx]
+
+def get_top_movers(df_calls, df_puts, k: int = 5):
+    # Top k based on decreasing OI Change % (max first)
+    return top_k(df_calls, "OI Change %", k), top_k(df_puts, "OI Change %", k)